@@ -31,7 +31,7 @@ setup(
 	keywords='sequence file parser image ultra frames',
 	platforms=['MacOS 10.10', 'MacOS 10.11', 'MacOS 10.12', 'MacOS 10.13'],
 	python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, <4',
-	install_requires=[],
+	install_requires=['scandir; python_version < "3.5"'],
 	entry_points={
 		'console_scripts': [
 			'findseq=ultrasequence.bin.findseq:main'
@@ -19,22 +19,56 @@ except ImportError:
 	import ConfigParser as configparser
 	PYTHON_VERSION = 2
 import os
+import re
+try:
+	from os import cpu_count
+except ImportError:
+	from multiprocessing import cpu_count
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 logging.basicConfig()
 
 
+class _DictConfig(object):
+	"""
+	A minimal read-only stand-in for a ConfigParser, backed by a dict of
+	sections. It lets the defaults be loaded by UsConfig._load_config
+	without building a ConfigParser.
+	"""
+	def __init__(self, config):
+		self._config = config
+
+	def has_option(self, section, option):
+		return option in self._config[section]
+
+	def get(self, section, option):
+		return str(self._config[section][option])
+
+	def getint(self, section, option):
+		return int(self.get(section, option))
+
+	def getboolean(self, section, option):
+		return self.get(section, option).lower() == 'true'
+
+
 class UsConfig(object):
 	"""
 	This class sets up a default configuration, and then tries to overload
 	all the attributes with the values from a user configuration file. All
 	available config options are accessible as instance attributes.
 	"""
+	# Attributes assigned from the config files by _load_config.
+	_options = frozenset([
+		'format', 'recurse', 'ignore_padding', 'include_exts',
+		'exclude_exts', 'get_stats', 'stat_workers', 'frame_extract_re',
+		'head_group', 'frame_group', 'tail_group'])
+
 	def __init__(self):
 		"""
-		Init the default parser, and then overload with values found in a
-		local config file.
+		Init the default config values. Nothing is parsed until the first
+		config option is accessed, at which point the defaults are loaded
+		and overloaded with values found in a local config file.
 		"""
 		self.default_config = {
 			'global': {
@@ -44,6 +78,7 @@ class UsConfig(object):
 				'include_exts': '',
 				'exclude_exts': '',
 				'get_stats': 'false',
+				'stat_workers': 0,
 			},
 			'regex': {
 				'frame_extract': r'((.*)(\D))?(\d+)(.*)',
@@ -53,23 +88,45 @@ class UsConfig(object):
 			}
 		}
 		self.user_config_file = os.path.expanduser('~/.ultrasequence.conf')
-		self.default_parser = configparser.RawConfigParser()
+		self._default_parser = None
+		self._loaded = False
 
-		if PYTHON_VERSION == 3:
-			self.default_parser.read_dict(self.default_config)
-		else:
-			self.default_parser.add_section('global')
-			for key in self.default_config['global'].keys():
-				self.default_parser.set(
-					'global', key, self.default_config['global'][key])
-			self.default_parser.add_section('regex')
-			for key in self.default_config['regex'].keys():
-				self.default_parser.set(
-					'regex', key, self.default_config['regex'][key])
-
-		self._load_config(self.default_parser)
+	def __getattr__(self, name):
+		""" Load the config the first time a missing option is accessed. """
+		if name.startswith('__') or self.__dict__.get('_loaded', True):
+			raise AttributeError(
+				"'UsConfig' object has no attribute '%s'" % name)
+		self._load()
+		return getattr(self, name)
+
+	def __setattr__(self, name, value):
+		""" Load the config before an option is overridden. """
+		if name in self._options and not self.__dict__.get('_loaded', True):
+			self._load()
+		super(UsConfig, self).__setattr__(name, value)
+
+	def _load(self):
+		""" Load the default config, then overload it with the user's. """
+		self.reset_defaults()
 		self._load_user_config()
 
+	@property
+	def default_parser(self):
+		"""
+		The ConfigParser holding the default config. It is only built
+		when needed, which is when writing a user config file.
+		"""
+		if self._default_parser is None:
+			self._default_parser = configparser.RawConfigParser()
+			if PYTHON_VERSION == 3:
+				self._default_parser.read_dict(self.default_config)
+			else:
+				for section in ('global', 'regex'):
+					self._default_parser.add_section(section)
+					for key, value in self.default_config[section].items():
+						self._default_parser.set(section, key, value)
+		return self._default_parser
+
 	def __repr__(self):
 		return (
 			'Config({recurse={0}, ignore_padding={1}, include_exts={2},'
@@ -77,6 +134,17 @@ class UsConfig(object):
 				self.recurse, self.ignore_padding, self.include_exts,
 				self.exclude_exts, self.get_stats, self.format))
 
+	@property
+	def frame_extract_re(self):
+		""" The regex pattern string used to extract frame numbers. """
+		return self._frame_extract_re
+
+	@frame_extract_re.setter
+	def frame_extract_re(self, pattern):
+		""" Set the pattern and compile it once for the models to use. """
+		self._frame_extract_re = pattern
+		self._frame_re = re.compile(pattern)
+
 	def _load_config(self, cfgparser):
 		"""
 		Assign all config values to Config instance attributes.
@@ -89,6 +157,12 @@ class UsConfig(object):
 		self.include_exts = cfgparser.get('global', 'include_exts').split()
 		self.exclude_exts = cfgparser.get('global', 'exclude_exts').split()
 		self.get_stats = cfgparser.getboolean('global', 'get_stats')
+		# Config files written before stat_workers existed don't have it.
+		if cfgparser.has_option('global', 'stat_workers'):
+			stat_workers = cfgparser.getint('global', 'stat_workers')
+		else:
+			stat_workers = 0
+		self.stat_workers = stat_workers or min(32, (cpu_count() or 1) * 4)
 		self.frame_extract_re = cfgparser.get('regex', 'frame_extract')
 		self.head_group = cfgparser.getint('regex', 'head_group')
 		self.frame_group = cfgparser.getint('regex', 'frame_group')
@@ -102,7 +176,9 @@ class UsConfig(object):
 			self._load_config(cfgparser)
 
 	def reset_defaults(self):
-		self._load_config(self.default_parser)
+		""" Load the default config, ignoring any user config file. """
+		self._loaded = True
+		self._load_config(_DictConfig(self.default_config))
 
 	def write_user_config(self):
 		""" Save a user config file with the default values. """
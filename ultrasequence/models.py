@@ -7,6 +7,8 @@ Contains the core data structure models for sequencing files.
 import logging
 import os
 import re
+from functools import total_ordering
+from itertools import groupby
 from .config import CONFIG as cfg
 
 try:
@@ -14,9 +16,41 @@ try:
 except NameError:
 	FileNotFoundError = OSError
 
+try:
+	from sys import intern
+except ImportError:
+	pass  # Python 2 provides intern as a builtin.
+
 
 logger = logging.getLogger(__name__)
 
+# Maps File stat attribute names to their os.stat_result field names.
+_STAT_FIELDS = {
+	'size': 'st_size',
+	'inode': 'st_ino',
+	'nlink': 'st_nlink',
+	'dev': 'st_dev',
+	'mode': 'st_mode',
+	'uid': 'st_uid',
+	'gid': 'st_gid',
+	'ctime': 'st_ctime',
+	'mtime': 'st_mtime',
+	'atime': 'st_atime',
+}
+
+
+def _intern(key):
+	"""
+	Intern a sequence key. Python 2 can only intern byte strings, so
+	unicode keys are returned as is.
+	"""
+	if isinstance(key, str):
+		return intern(key)
+	return key
+
+# Matches a Sequence.format directive, capturing the directive character.
+_FORMAT_RE = re.compile(r'%(.)', re.DOTALL)
+
 
 def extract_frame(name):
 	"""
@@ -32,7 +66,7 @@ def extract_frame(name):
 	         (last set of digits), and tail (all digits succeeding
 	         the frame number).
 	"""
-	frame_match = re.match(cfg.frame_extract_re, name)
+	frame_match = cfg._frame_re.match(name)
 	if frame_match:
 		groups = frame_match.groups()
 		head, tail = groups[cfg.head_group], groups[cfg.tail_group]
@@ -53,11 +87,9 @@ def split_extension(filename):
 	:return: A tuple of the head (characters before the last '.') and
 			 the extension (characters after the last '.').
 	"""
-	parts = filename.split('.')
-	if len(parts) < 2:
-		return parts[0], ''
-	ext = parts.pop(-1)
-	head = '.'.join(parts)
+	head, sep, ext = filename.rpartition('.')
+	if not sep:
+		return filename, ''
 	return head, ext
 
 
@@ -68,32 +100,39 @@ def frame_ranges_to_string(frames):
 	>>> frame_ranges_to_string([1, 2, 3, 6, 7, 8, 9, 13, 15])
 	'[1-3, 6-9, 13, 15]'
 
-	:param list frames: Sorted list of frame numbers.
+	:param list frames: Iterable of frame numbers, it is not modified.
 	:return: String of broken frame ranges (i.e '[10-14, 16, 20-25]').
 	"""
 	if not frames:
 		return '[]'
-	if not isinstance(frames, list):
-		frames = list(frames)
-	frames.sort()
-
-	# Make list of lists for each consecutive range
-	ranges = [[frames.pop(0)]]
-	current_range_index = 0  # index of current range
-	for x in frames:
-		if x - 1 == ranges[current_range_index][-1]:
-			ranges[current_range_index].append(x)
-		else:
-			current_range_index += 1
-			ranges.append([x])
+	# Consecutive frames share the same difference to their sorted index.
 	range_strings = []
-	for x in ranges:
-		if len(x) > 1:
-			range_strings.append('-'.join([str(x[0]), str(x[-1])]))
+	for _, group in groupby(enumerate(sorted(frames)), lambda p: p[1] - p[0]):
+		first = last = next(group)[1]
+		for _, last in group:
+			pass
+		if first == last:
+			range_strings.append(str(first))
 		else:
-			range_strings.append(str(x[0]))
-	complete_string = '[' + ', '.join(range_strings) + ']'
-	return complete_string
+			range_strings.append('%s-%s' % (first, last))
+	return '[' + ', '.join(range_strings) + ']'
+
+
+def _to_number(type_, value):
+	"""
+	Convert a stat value to int or float, treating values that can't be
+	converted (such as 'n/a' in an offline listing) as missing.
+
+	:param type type_: int or float.
+	:param value: The value to convert.
+	:return: The converted value, or None.
+	"""
+	if value is None:
+		return None
+	try:
+		return type_(value)
+	except ValueError:
+		return None
 
 
 class Stat(object):
@@ -103,6 +142,8 @@ class Stat(object):
 	you want to maintain the stat information from a previously parsed
 	directory which the current machine does not have access to.
 	"""
+	__slots__ = ('st_size', 'st_ino', 'st_nlink', 'st_dev', 'st_mode',
+				 'st_uid', 'st_gid', 'st_ctime', 'st_mtime', 'st_atime')
 
 	def __init__(self, size=None, ino=None, ctime=None, mtime=None,
 				 atime=None, mode=None, dev=None, nlink=None, uid=None,
@@ -121,37 +162,34 @@ class Stat(object):
 		:param int uid: User id of the owner.
 		:param int gid: Group id of the owner.
 		"""
-		self.st_size = size
-		self.st_ino = ino
-		self.st_nlink = nlink
-		self.st_dev = dev
-		self.st_mode = mode
-		self.st_uid = uid
-		self.st_gid = gid
-		self.st_ctime = ctime
-		self.st_mtime = mtime
-		self.st_atime = atime
-
-	def __getattr__(self, item):
-		ints = ['st_size', 'st_ino', 'st_nlink', 'st_dev', 'st_mode',
-				'st_uid', 'st_gid']
-		floats = ['st_ctime', 'st_mtime', 'st_atime']
-		try:
-			if item in ints:
-				return int(super(Stat, self).__getattribute__(item))
-			elif item in floats:
-				return float(super(Stat, self).__getattribute__(item))
-		except TypeError:
-			return None
-
-
+		self.st_size = _to_number(int, size)
+		self.st_ino = _to_number(int, ino)
+		self.st_nlink = _to_number(int, nlink)
+		self.st_dev = _to_number(int, dev)
+		self.st_mode = _to_number(int, mode)
+		self.st_uid = _to_number(int, uid)
+		self.st_gid = _to_number(int, gid)
+		self.st_ctime = _to_number(float, ctime)
+		self.st_mtime = _to_number(float, mtime)
+		self.st_atime = _to_number(float, atime)
+
+
+@total_ordering
 class File(object):
 	"""
 	The class that represents a single file and all of it's Stat
 	attributes if available. It contains attributes for the 
 	various string parts of the path, base filename, frame number
 	and extension. All Sequences are comprised of File objects.
+
+	The stat values are available as the attributes size, inode, nlink,
+	dev, mode, uid, gid, ctime, mtime and atime. Each is the matching
+	Stat.st_* value if available, otherwise os.stat is tried on the file,
+	and None is returned if it doesn't exist.
 	"""
+	__slots__ = ('abspath', 'path', 'name', '_base', 'ext', 'namehead',
+				 '_framenum', '_frame', 'tail', 'head', 'padding', 'stat',
+				 '_seq_key_ignore', '_seq_key_strict')
 
 	def __init__(self, filepath, stats=None, get_stats=None):
 		"""
@@ -180,6 +218,19 @@ class File(object):
 		else:
 			self.tail = '.'.join([tail, self.ext])
 		self.padding = len(self._framenum)
+		try:
+			self._frame = int(self._framenum)
+		except ValueError:
+			self._frame = None
+		# Keys are interned so every frame of a sequence shares one string,
+		# and sequence dict lookups can match on identity.
+		if self._framenum:
+			self._seq_key_ignore = _intern(self.head + '#' + self.tail)
+			self._seq_key_strict = _intern(
+				self.head + '%%0%dd' % self.padding + self.tail)
+		else:
+			self._seq_key_ignore = self._seq_key_strict = _intern(
+				self.head + self.tail)
 
 		try:
 			if get_stats:
@@ -207,177 +258,49 @@ class File(object):
 
 	def __lt__(self, other):
 		if isinstance(other, File):
-			return self.frame < other.frame
-		else:
-			raise TypeError('%s not File instance.' % str(other))
-
-	def __gt__(self, other):
-		if isinstance(other, File):
-			return self.frame > other.frame
-		else:
-			raise TypeError('%s not File instance.' % str(other))
-
-	def __le__(self, other):
-		if isinstance(other, File):
-			return self.frame <= other.frame
-		else:
-			raise TypeError('%s not File instance.' % str(other))
-
-	def __ge__(self, other):
-		if isinstance(other, File):
-			return self.frame >= other.frame
+			return (self._frame, self.head, self.tail) < (other._frame,
+														  other.head,
+														  other.tail)
 		else:
 			raise TypeError('%s not File instance.' % str(other))
 
 	def __eq__(self, other):
 		if isinstance(other, File):
-			return (self.head, self.frame, self.tail) == (other.head,
-														  other.frame,
-														  other.tail)
+			return (self._frame, self.head, self.tail) == (other._frame,
+														   other.head,
+														   other.tail)
 		else:
 			return False
 
 	def __ne__(self, other):
-		if isinstance(other, File):
-			return (self.head, self.frame, self.tail) != (other.head,
-														  other.frame,
-														  other.tail)
-		else:
-			return True
+		return not self == other
+
+	def __getattr__(self, name):
+		""" Resolve the stat attributes listed in _STAT_FIELDS. """
+		field = _STAT_FIELDS.get(name)
+		if field is None:
+			raise AttributeError(
+				"'File' object has no attribute '%s'" % name)
+		value = getattr(self.stat, field)
+		if value is not None or not isinstance(self.stat, Stat):
+			return value
+		try:
+			value = getattr(os.stat(self.abspath), field)
+		except FileNotFoundError:
+			return
+		setattr(self.stat, field, value)
+		return value
 
 	@property
 	def frame(self):
 		""" Integer frame number. """
-		try:
-			return int(self._framenum)
-		except ValueError:
-			return None
+		return self._frame
 
 	@property
 	def frame_as_str(self):
 		""" Str frame number with padding matching original filename. """
 		return self._framenum
 
-	@property
-	def size(self):
-		""" Same as Stat.st_size if available, otherwise None. """
-		if not self.stat.st_size:
-			try:
-				self.stat.st_size = os.stat(self.abspath).st_size
-				return self.stat.st_size
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_size
-
-	@property
-	def inode(self):
-		""" Same as Stat.st_ino if available, otherwise None. """
-		if not self.stat.st_ino:
-			try:
-				self.stat.st_ino = os.stat(self.abspath).st_ino
-				return self.stat.st_ino
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_ino
-
-	@property
-	def nlink(self):
-		""" Same as Stat.st_nlink if available, otherwise None. """
-		if not self.stat.st_nlink:
-			try:
-				self.stat.st_nlink = os.stat(self.abspath).st_nlink
-				return self.stat.st_nlink
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_nlink
-
-	@property
-	def dev(self):
-		""" Same as Stat.st_dev if available, otherwise None. """
-		if not self.stat.st_dev:
-			try:
-				self.stat.st_dev = os.stat(self.abspath).st_dev
-				return self.stat.st_dev
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_dev
-
-	@property
-	def mode(self):
-		""" Same as Stat.st_mode if available, otherwise None. """
-		if not self.stat.st_mode:
-			try:
-				self.stat.st_mode = os.stat(self.abspath).st_mode
-				return self.stat.st_mode
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_mode
-
-	@property
-	def uid(self):
-		""" Same as Stat.st_uid if available, otherwise None. """
-		if not self.stat.st_uid:
-			try:
-				self.stat.st_uid = os.stat(self.abspath).st_uid
-				return self.stat.st_gid
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_uid
-
-	@property
-	def gid(self):
-		""" Same as Stat.st_gid if available, otherwise None. """
-		if not self.stat.st_gid:
-			try:
-				self.stat.st_gid = os.stat(self.abspath).st_gid
-				return self.stat.st_gid
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_gid
-
-	@property
-	def ctime(self):
-		""" Same as Stat.st_ctime if available, otherwise None. """
-		if not self.stat.st_ctime:
-			try:
-				self.stat.st_ctime = os.stat(self.abspath).st_ctime
-				return self.stat.st_ctime
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_ctime
-
-	@property
-	def mtime(self):
-		""" Same as Stat.st_mtime if available, otherwise None. """
-		if not self.stat.st_mtime:
-			try:
-				self.stat.st_mtime = os.stat(self.abspath).st_mtime
-				return self.stat.st_mtime
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_mtime
-
-	@property
-	def atime(self):
-		""" Same as Stat.st_atime if available, otherwise None. """
-		if not self.stat.st_atime:
-			try:
-				self.stat.st_atime = os.stat(self.abspath).st_atime
-				return self.stat.st_atime
-			except FileNotFoundError:
-				return
-		else:
-			return self.stat.st_atime
-
 	def get_seq_key(self, ignore_padding=None):
 		"""
 		Make a sequence global name for matching frames to correct
@@ -388,15 +311,12 @@ class File(object):
 		"""
 		if ignore_padding is None or not isinstance(ignore_padding, bool):
 			ignore_padding = cfg.ignore_padding
-		if not self._framenum:
-			digits = ''
-		elif ignore_padding is True:
-			digits = '#'
+		if ignore_padding is True:
+			return self._seq_key_ignore
 		elif ignore_padding is False:
-			digits = '%%0%dd' % self.padding
+			return self._seq_key_strict
 		else:
 			raise TypeError('ignore_padding argument must be of type bool.')
-		return self.head + digits + self.tail
 
 
 class Sequence(object):
@@ -410,6 +330,9 @@ class Sequence(object):
 	sequences, the file key gnerated from File.get_seq_key() is used to
 	instantly match the sequence it belongs to.
 	"""
+	__slots__ = ('_frames', '_sorted_keys', '_min_frame', '_max_frame',
+				 '_size', 'seq_name', 'path', 'namehead', 'head', 'tail',
+				 'ext', 'padding', 'inconsistent_padding', 'ignore_padding')
 
 	def __init__(self, frame_file=None, ignore_padding=None):
 		"""
@@ -419,11 +342,17 @@ class Sequence(object):
 		                         initialze a File object from.
 		:param bool ignore_padding: True to allow inconsistent padding
 		                            as same sequence, False to treat
-		                            as separate sequences.
+		                            as separate sequences. Defaults to
+		                            cfg.ignore_padding.
 		"""
-		if ignore_padding is not None and isinstance(ignore_padding, bool):
-			cfg.ignore_padding = ignore_padding
+		if ignore_padding is None or not isinstance(ignore_padding, bool):
+			ignore_padding = cfg.ignore_padding
+		self.ignore_padding = ignore_padding
 		self._frames = {}
+		self._sorted_keys = None
+		self._min_frame = None
+		self._max_frame = None
+		self._size = 0
 		self.seq_name = ''
 		self.path = ''
 		self.namehead = ''
@@ -446,13 +375,12 @@ class Sequence(object):
 		return len(self._frames)
 
 	def __iter__(self):
-		return iter([self._frames[frame] for frame in self._frames])
+		return iter(self._frames.values())
 
 	def __getitem__(self, frames):
-		all_frames = list(sorted(self._frames))
 		if isinstance(frames, slice):
-			return [self._frames[f] for f in sorted(self._frames)][frames]
-		return self._frames[all_frames[frames]]
+			return [self._frames[f] for f in self._keys()[frames]]
+		return self._frames[self._keys()[frames]]
 
 	def __lt__(self, other):
 		if isinstance(other, str):
@@ -460,6 +388,12 @@ class Sequence(object):
 		else:
 			return self.seq_name < other.seq_name
 
+	def _keys(self):
+		""" Sorted list of frame numbers, cached until the next append. """
+		if self._sorted_keys is None:
+			self._sorted_keys = sorted(self._frames)
+		return self._sorted_keys
+
 	@property
 	def abspath(self):
 		""" Full sequence path name (i.e. '/path/to/file.#.dpx'). """
@@ -473,12 +407,12 @@ class Sequence(object):
 	@property
 	def start(self):
 		""" Int of first frame in sequence. """
-		return min(self._frames)
+		return self._min_frame
 
 	@property
 	def end(self):
 		""" Int of last frame in sequence. """
-		return max(self._frames)
+		return self._max_frame
 
 	@property
 	def frames(self):
@@ -488,7 +422,7 @@ class Sequence(object):
 	@property
 	def frame_numbers(self):
 		""" List of frame ints in sequence. """
-		return list(sorted(self._frames))
+		return list(self._keys())
 
 	@property
 	def frame_range(self):
@@ -507,11 +441,26 @@ class Sequence(object):
 
 	@property
 	def size(self):
-		""" Sum of all filesizes (in bytes) in sequence. """
-		try:
-			return sum([file_.size for file_ in self])
-		except TypeError:
-			return
+		"""
+		Sum of all filesizes (in bytes) in sequence. The total is kept up
+		to date by append, unless a frame was appended without a known
+		size, in which case the sizes are summed (and stat'd if needed).
+		"""
+		if self._size is None:
+			try:
+				self._size = sum(file_.size for file_ in self)
+			except TypeError:
+				return
+		return self._size
+
+	def ordered(self):
+		"""
+		Iterate the sequence's File objects sorted by frame number,
+		rather than in the order they were appended.
+
+		:return: A generator of File instances.
+		"""
+		return (self._frames[frame] for frame in self._keys())
 
 	def get_frame(self, frame):
 		"""
@@ -549,8 +498,10 @@ class Sequence(object):
 
 	def get_missing_frames(self):
 		""" Get list of frame numbers missing in sequence. """
-		implied = range(self.start, self.end + 1)
-		return [frame for frame in implied if frame not in self._frames]
+		if not self.is_missing_frames:
+			return []
+		implied = set(range(self.start, self.end + 1))
+		return sorted(implied.difference(self._frames))
 
 	def append(self, frame_file):
 		"""
@@ -564,7 +515,7 @@ class Sequence(object):
 			if isinstance(frame_file, str):
 				frame_file = File(frame_file)
 				if len(self._frames) > 0 and frame_file.get_seq_key(
-						cfg.ignore_padding) != self.seq_name:
+						self.ignore_padding) != self.seq_name:
 					raise ValueError('%s is not a member of %s. Not appending.'
 					                 % (frame_file, repr(self)))
 		if frame_file.frame is None:
@@ -576,7 +527,7 @@ class Sequence(object):
 			self.tail = frame_file.tail
 			self.ext = frame_file.ext
 			self.padding = frame_file.padding
-			self.seq_name = frame_file.get_seq_key(cfg.ignore_padding)
+			self.seq_name = frame_file.get_seq_key(self.ignore_padding)
 		elif frame_file.frame in self._frames:
 			raise IndexError(
 				'%s already in sequence as %s' % (
@@ -584,9 +535,18 @@ class Sequence(object):
 		elif self.padding < frame_file.padding:
 			self.inconsistent_padding = True
 			self.padding = frame_file.padding
-		self._frames[frame_file.frame] = frame_file
-
-	def format(self, str_format=cfg.format):
+		frame = frame_file.frame
+		self._frames[frame] = frame_file
+		self._sorted_keys = None
+		if self._min_frame is None or frame < self._min_frame:
+			self._min_frame = frame
+		if self._max_frame is None or frame > self._max_frame:
+			self._max_frame = frame
+		if self._size is not None:
+			size = frame_file.stat.st_size
+			self._size = None if size is None else self._size + size
+
+	def format(self, str_format=None):
 		"""
 		This formatter will replace any of the formatting directives
 		found in the format argument with it's string part. It will try
@@ -631,45 +591,17 @@ class Sequence(object):
 		| '%e' |  extension without dot          |  'ext'                   |
 		+------+---------------------------------+--------------------------+
 
-		:param str_format: The string directive for the formatter to convert.
+		:param str_format: The string directive for the formatter to convert,
+		                   defaults to cfg.format.
 		:return: The formatted sequence string.
 		"""
+		if str_format is None:
+			str_format = cfg.format
+		directives = self._directives
+		return _FORMAT_RE.sub(
+			lambda match: directives[match.group(1)](self), str_format)
 
-		# Call functions to minimize processes run during formatter execution.
-		directive_mapper = {
-			'%%': self.__pct,
-			'%p': self.__path,
-			'%h': self.__namehead,
-			'%H': self.__head,
-			'%f': self.__num_frames,
-			'%r': self.__implied_range,
-			'%R': self.__explicit_range,
-			'%m': self.__num_missing_frames,
-			'%M': self.__explicit_missing_range,
-			'%D': self.__digits_pound_signs,
-			'%P': self.__digits_padding,
-			'%t': self.__tail_without_ext,
-			'%T': self.__tail,
-			'%e': self.__ext,
-			}
-		str_format = [c for c in str_format]
-		new_string = ''
-
-		matched = False
-		for char in str_format:
-			if matched:
-				new_string += directive_mapper['%' + char]()
-				matched = False
-				continue
-			if char == '%':
-				matched = True
-				continue
-			else:
-				new_string += char
-		return new_string
-
-	@staticmethod
-	def __pct():
+	def __pct(self):
 		""" Internal formatter method """
 		return '%'
 
@@ -696,7 +628,7 @@ class Sequence(object):
 
 	def __explicit_range(self):
 		""" Internal formatter method """
-		return frame_ranges_to_string(sorted(self._frames))
+		return frame_ranges_to_string(self._keys())
 
 	def __num_missing_frames(self):
 		""" Internal formatter method """
@@ -716,7 +648,7 @@ class Sequence(object):
 
 	def __tail_without_ext(self):
 		""" Internal formatter method """
-		return '.'.join(self.tail.split('.')[:-1])
+		return self.tail.rpartition('.')[0]
 
 	def __tail(self):
 		""" Internal formatter method """
@@ -725,3 +657,21 @@ class Sequence(object):
 	def __ext(self):
 		""" Internal formatter method """
 		return self.ext
+
+	# Format directive characters mapped to their internal formatter methods.
+	_directives = {
+		'%': __pct,
+		'p': __path,
+		'h': __namehead,
+		'H': __head,
+		'f': __num_frames,
+		'r': __implied_range,
+		'R': __explicit_range,
+		'm': __num_missing_frames,
+		'M': __explicit_missing_range,
+		'D': __digits_pound_signs,
+		'P': __digits_padding,
+		't': __tail_without_ext,
+		'T': __tail,
+		'e': __ext,
+		}
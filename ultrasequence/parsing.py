@@ -4,65 +4,206 @@ PARSING
 This module contains functions and classes for parsing files and directories
 for file sequences.
 """
+import csv
 import logging
 import os
 import sys
-from os import walk
 from ultrasequence.config import CONFIG as cfg
 from ultrasequence.models import File, Sequence
 
+try:
+	from os import scandir
+except ImportError:
+	from scandir import scandir
+try:
+	from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+	ThreadPoolExecutor = None
+
+try:
+	FileNotFoundError
+except NameError:
+	FileNotFoundError = OSError
+
 
 logger = logging.getLogger(__name__)
 
+# Number of files stat'd per thread pool task.
+_STAT_CHUNK_SIZE = 256
+
 
-if sys.version_info < (3, 5):
+def scan_dir(path, recurse=None, get_stats=None):
+	"""
+	Searches a root directory and yields all files. If recurse is True,
+	the scanner will descend all child directories, skipping any that
+	can't be read.
+
+	:param str path: The root path to scan for files.
+	:param bool recurse: Descend child directories, defaults to
+	                     cfg.recurse.
+	:param bool get_stats: Stat each file, defaults to cfg.get_stats.
+	:return: A generator of filenames if get_stats is False, or of
+			 tuples (filename, file_stats) if get_stats is True.
+	"""
+	if recurse is None:
+		recurse = cfg.recurse
+	if get_stats is None:
+		get_stats = cfg.get_stats
+	executor = _stat_executor() if get_stats else None
 	try:
-		from scandir import walk
-	except ImportError:
-		logger.warning('For Python versions < 3.5, scandir module is '
-		               'recommended for faster directory parsing. Run:'
-		               '\n>>> pip install scandir')
+		if not recurse:
+			for file_ in _scan_one(path, None, get_stats, executor):
+				yield file_
+			return
+		dirs = [path]
+		while dirs:
+			root = dirs.pop()
+			subdirs = []
+			try:
+				for file_ in _scan_one(root, subdirs, get_stats, executor):
+					yield file_
+			except OSError as e:
+				# Like os.walk, skip child directories that can't be read.
+				if root == path:
+					raise
+				logger.warning('Skipping directory %s: %s' % (root, e))
+			# Push in reverse so directories are visited in listing order.
+			dirs += reversed(subdirs)
+	finally:
+		if executor is not None:
+			executor.shutdown()
 
 
-def scan_dir(path):
+def stat_files(root, get_stats=None):
 	"""
-	Searches a root directory and returns a list of all files. If 
-	cfg.recurse is True, the scanner will descend all child directories.
+	Yields the files of a single directory. The directory is read with
+	scandir, so file types come straight from the directory listing and
+	at most one stat call is made per file.
 
-	:param str path: The root path to scan for files.
-	:return: A list of filenames if cfg.get_stats is False, or a list
-			 of tuples (filename, file_stats) if cfg.get_stats is True.
+	:param str root: The the root path to the current directory.
+	:param bool get_stats: Stat each file, defaults to cfg.get_stats.
+	:return: a generator of filenames if get_stats is False, or of
+			 tuples (filename, file_stats) if get_stats is True.
 	"""
-	file_list = []
-	if cfg.recurse:
-		for root, dirs, files in walk(path):
-			file_list += stat_files(root, files)
-	else:
-		file_list += stat_files(path, os.listdir(path))
-	return file_list
+	if isinstance(get_stats, (list, tuple)):
+		raise TypeError('stat_files lists the directory itself and no '
+		                'longer takes a list of file names.')
+	return scan_dir(root, False, get_stats)
 
 
-def stat_files(root, files):
+def _scan_one(root, subdirs, get_stats, executor=None):
 	"""
-	Assembles a list of files for a single directory.
+	Yields the files of a single directory for scan_dir. Files that
+	disappear before they are stat'd are left out.
 
 	:param str root: The the root path to the current directory.
-	:param list files: The list of filenames in the directory.
-	:return: a list of filenames if cfg.get_stats is False, or a list
-			 of tuples (filename, file_stats) if cfg.get_stats is True.
-	"""
-	dir_list = []
-	if cfg.get_stats:
-		for file_ in files:
-			abspath = os.path.join(root, file_)
-			# TODO: For links, copy the stat from source, but set size to 0
-			# if os.path.islink(abspath):
-			# 	continue
-			dir_list.append((abspath, os.stat(abspath)))
+	:param list subdirs: If not None, the paths of all child directories
+	                     (not following symlinks) are appended to it.
+	:param bool get_stats: Stat each file.
+	:param executor: Optional thread pool used to stat large directories.
+	:return: a generator of filenames if get_stats is False, or of
+			 tuples (filename, file_stats) if get_stats is True.
+	"""
+	stat_entries = []
+	entries = scandir(root)
+	try:
+		for entry in entries:
+			if subdirs is not None and entry.is_dir(follow_symlinks=False):
+				subdirs.append(entry.path)
+			elif not entry.is_file():
+				continue
+			elif not get_stats:
+				yield entry.path
+			elif executor is None:
+				stat = _stat(entry)
+				if stat is not None:
+					yield entry.path, stat
+			else:
+				stat_entries.append(entry)
+	finally:
+		# Release the directory handle even if the generator is abandoned.
+		# Older scandir backports have no close method.
+		if hasattr(entries, 'close'):
+			entries.close()
+	for entry, stat in _stat_entries(stat_entries, executor):
+		yield entry.path, stat
+
+
+def _stat_executor():
+	"""
+	Make the thread pool for stat calls. Stat calls are I/O bound, so
+	spreading them across up to cfg.stat_workers threads helps most on
+	network file systems. Setting cfg.stat_workers to 1 disables it.
+
+	:return: a ThreadPoolExecutor, or None if threading is disabled.
+	"""
+	if cfg.stat_workers < 2 or ThreadPoolExecutor is None:
+		return None
+	return ThreadPoolExecutor(max_workers=cfg.stat_workers)
+
+
+def _stat(entry):
+	"""
+	Stat a scandir entry, following symlinks to their source.
+
+	:return: the stat result, or None if the file no longer exists.
+	"""
+	try:
+		return entry.stat()
+	except FileNotFoundError:
+		return None
+
+
+def _stat_chunk(entries):
+	""" Stat a list of scandir entries in a single thread pool task. """
+	return [_stat(entry) for entry in entries]
+
+
+def _stat_entries(entries, executor):
+	"""
+	Lazily yield the stats of a directory's scandir entries. The entries
+	are stat'd on the thread pool in chunks, since a pool task per file
+	costs more than a local stat call. Directories smaller than a chunk
+	are stat'd directly.
+
+	:param list entries: scandir entries to stat.
+	:param executor: The thread pool to stat the entries on.
+	:return: a generator of (entry, stat) tuples, skipping entries that
+	         no longer exist.
+	"""
+	if len(entries) <= _STAT_CHUNK_SIZE:
+		chunks = [entries]
+		results = [_stat_chunk(entries)] if entries else []
 	else:
-		dir_list += [os.path.join(root, file_) for file_ in files
-					 if os.path.isfile(os.path.join(root, file_))]
-	return dir_list
+		chunks = [entries[i:i + _STAT_CHUNK_SIZE]
+		          for i in range(0, len(entries), _STAT_CHUNK_SIZE)]
+		results = executor.map(_stat_chunk, chunks)
+	for chunk, stats in zip(chunks, results):
+		for entry, stat in zip(chunk, stats):
+			if stat is not None:
+				yield entry, stat
+
+
+def _open_csv(path):
+	""" Open a file for the csv module, which handles newlines itself. """
+	if sys.version_info < (3,):
+		return open(path, 'rb')
+	return open(path, 'r', newline='')
+
+
+def _read_rows(file_list, sep):
+	"""
+	Split the lines of a delimited file listing. The csv module only
+	supports single character delimiters, so longer separators fall back
+	to a plain split without quoting support.
+
+	:param file file_list: The open file to read.
+	:param str sep: The column separator.
+	:return: An iterator of lists of column values.
+	"""
+	if len(sep) == 1:
+		return csv.reader(file_list, delimiter=sep)
+	return (line.rstrip('\r\n').split(sep) for line in file_list)
 
 
 class Parser(object):
@@ -100,11 +241,11 @@ class Parser(object):
 	excluded=10, collisions=0)'
 	"""
 
-	def __init__(self, include_exts=cfg.include_exts,
-	             exclude_exts=cfg.exclude_exts, get_stats=cfg.get_stats,
-	             ignore_padding=cfg.ignore_padding):
+	def __init__(self, include_exts=None, exclude_exts=None, get_stats=None,
+	             ignore_padding=None):
 		"""
 		Main parser class. Sets up config parameters for parsing methods.
+		Any parameter left as None uses its value from cfg.
 		
 		:param list include_exts: file extensions to include in parsing
 		:param list exclude_exts: file extensions to explicitly exclude in
@@ -113,17 +254,26 @@ class Parser(object):
 		:param bool ignore_padding: ignore the number of digits in the
 		                            file's frame number section
 		"""
+		if include_exts is None:
+			include_exts = cfg.include_exts
+		if exclude_exts is None:
+			exclude_exts = cfg.exclude_exts
+		if get_stats is None:
+			get_stats = cfg.get_stats
+		if ignore_padding is None:
+			ignore_padding = cfg.ignore_padding
+
 		if not include_exts or not isinstance(include_exts, (tuple, list)):
 			self.include_exts = set()
 		else:
-			self.include_exts = set(include_exts)
+			self.include_exts = set(ext.lower() for ext in include_exts)
 
 		if not exclude_exts or not isinstance(exclude_exts, (tuple, list)):
 			self.exclude_exts = set()
 		else:
-			self.exclude_exts = set(exclude_exts)
+			self.exclude_exts = set(ext.lower() for ext in exclude_exts)
 
-		cfg.get_stats = get_stats
+		self.get_stats = get_stats
 		self.ignore_padding = ignore_padding
 		self._reset()
 
@@ -150,70 +300,101 @@ class Parser(object):
 
 	def _cleanup(self):
 		""" Moves single frames out of sequences list. """
-		while self._sequences:
-			seq = self._sequences.popitem()[1]
+		for seq in self._sequences.values():
 			if seq.frames == 1:
-				self.orphan_frames.append(seq[0])
+				self.orphan_frames.append(next(iter(seq)))
 			else:
 				self.sequences.append(seq)
+		self._sequences.clear()
 		self.parsed = True
 
-	def _sort_file(self, filepath, stats=None):
-		""" Finds matching sequence for given filepath. """
+	def _sort_file(self, filepath, stats=None, ignore_padding=None):
+		"""
+		Finds matching sequence for given filepath. The parse methods
+		pass in self.ignore_padding so it is only read once per parse.
+		"""
 		file_ = File(filepath, stats=stats)
 
-		if self.include_exts and file_.ext.lower() not in self.include_exts \
-				or file_.ext.lower() in self.exclude_exts:
+		ext = file_.ext.lower()
+		if self.include_exts and ext not in self.include_exts \
+				or ext in self.exclude_exts:
 			self.excluded.append(file_)
 
 		elif file_.frame is None:
 			self.no_frame_numbers.append(file_)
 
 		else:
-			seq_name = file_.get_seq_key()
+			if ignore_padding is None:
+				ignore_padding = self.ignore_padding
+			if ignore_padding:
+				seq_name = file_._seq_key_ignore
+			else:
+				seq_name = file_._seq_key_strict
 			if seq_name in self._sequences:
 				try:
 					self._sequences[seq_name].append(file_)
 				except IndexError:
 					self.collisions.append(file_)
 			else:
-				self._sequences[seq_name] = Sequence(file_)
+				self._sequences[seq_name] = Sequence(file_, ignore_padding)
 
-	def parse_directory(self, directory, recurse=cfg.recurse):
+	def parse_directory(self, directory, recurse=None):
 		"""
 		Parse a directory on the file system.
 
 		:param str directory: Directory path to scan on filesystem.
-		:param bool recurse: Recurse all child directories.
+		:param bool recurse: Recurse all child directories, defaults to
+		                     cfg.recurse.
 		"""
 		self._reset()
-		cfg.recurse = recurse
+		if recurse is None:
+			recurse = cfg.recurse
 		directory = os.path.expanduser(directory)
 		if isinstance(directory, str) and os.path.isdir(directory):
-			file_list = scan_dir(directory)
-			while file_list:  # reduce memory consumption for large lists
-				file_ = file_list.pop(0)
-				if cfg.get_stats:
-					self._sort_file(file_[0], file_[1])
+			get_stats = self.get_stats
+			ignore_padding = self.ignore_padding
+			for file_ in scan_dir(directory, recurse, get_stats):
+				if get_stats:
+					self._sort_file(file_[0], file_[1], ignore_padding)
 				else:
-					self._sort_file(file_)
+					self._sort_file(file_, ignore_padding=ignore_padding)
 			self._cleanup()
 		else:
 			logger.warning('%s is not an available directory.' % directory)
 
-	def parse_file(self, input_file):
+	def parse_file(self, input_file, csv_sep=None, has_header=False):
 		"""
 		Parse a text file containing file listings.
 
 		:param str input_file: Path to the file containing a file listing.
+		:param str csv_sep: If supplied, each line is read as delimited
+		                    values with the filename in the first column,
+		                    followed by optional stat values in the
+		                    positional order of the Stat class. Stat
+		                    values that aren't numbers are treated as
+		                    missing.
+		:param bool has_header: Skip the first row of a csv_sep file.
 		"""
 		input_file = os.path.expanduser(input_file)
 
 		self._reset()
 		if isinstance(input_file, str) and os.path.isfile(input_file):
-			with open(input_file, 'r') as file_list:
-				for file_ in file_list:
-					self._sort_file(file_.rstrip())
+			ignore_padding = self.ignore_padding
+			if csv_sep:
+				with _open_csv(input_file) as file_list:
+					rows = _read_rows(file_list, csv_sep)
+					if has_header:
+						next(rows, None)
+					for row in rows:
+						if not row or not row[0]:
+							continue
+						stats = [value or None for value in row[1:]]
+						self._sort_file(row[0], stats or None, ignore_padding)
+			else:
+				with open(input_file, 'r') as file_list:
+					for file_ in file_list:
+						self._sort_file(
+							file_.rstrip(), ignore_padding=ignore_padding)
 			self._cleanup()
 		else:
 			logger.warning('%s is not a valid filepath.' % input_file)
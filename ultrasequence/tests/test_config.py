@@ -0,0 +1,83 @@
+import unittest
+import os
+import tempfile
+from unittest import TestCase
+from ultrasequence import config
+
+
+class TestUsConfig(TestCase):
+	def setUp(self):
+		self.cfg = config.UsConfig()
+		fd, self.cfg.user_config_file = tempfile.mkstemp()
+		with os.fdopen(fd, 'w') as f:
+			f.write('\n'.join([
+				'[global]',
+				'format = %h',
+				'recurse = true',
+				'ignore_padding = true',
+				'include_exts = ',
+				'exclude_exts = ',
+				'get_stats = false',
+				'stat_workers = 0',
+				'[regex]',
+				'frame_extract = ((.*)(\\D))?(\\d+)(.*)',
+				'head_group = 0',
+				'frame_group = 3',
+				'tail_group = 4',
+			]) + '\n')
+
+	def tearDown(self):
+		os.remove(self.cfg.user_config_file)
+
+	def test_lazy_load(self):
+		self.assertFalse(self.cfg._loaded)
+		self.assertNotIn('format', self.cfg.__dict__)
+		self.assertEqual(self.cfg.format, '%h')
+		self.assertTrue(self.cfg._loaded)
+		self.assertTrue(self.cfg.recurse)
+		self.assertTrue(self.cfg.ignore_padding)
+
+	def test_set_before_load(self):
+		self.cfg.recurse = False
+		self.assertEqual(self.cfg.format, '%h')
+		self.assertFalse(self.cfg.recurse)
+
+	def test_reset_defaults_skips_user_config(self):
+		self.cfg.reset_defaults()
+		self.assertEqual(self.cfg.format, '%H%r%T')
+		self.assertFalse(self.cfg.recurse)
+
+	def test_defaults_without_parser(self):
+		self.cfg.reset_defaults()
+		self.assertIsNone(self.cfg._default_parser)
+		self.assertEqual(self.cfg.include_exts, [])
+		self.assertTrue(self.cfg.ignore_padding)
+		self.assertEqual(self.cfg.frame_group, 3)
+
+	def test_default_parser_matches_defaults(self):
+		self.cfg.reset_defaults()
+		from_dict = dict((option, getattr(self.cfg, option))
+						 for option in self.cfg._options)
+		self.cfg._load_config(self.cfg.default_parser)
+		for option in self.cfg._options:
+			self.assertEqual(getattr(self.cfg, option), from_dict[option])
+
+	def test_frame_re(self):
+		self.assertEqual(self.cfg._frame_re.pattern,
+						 self.cfg.frame_extract_re)
+
+	def test_user_config_without_stat_workers(self):
+		with open(self.cfg.user_config_file) as f:
+			lines = [l for l in f if not l.startswith('stat_workers')]
+		with open(self.cfg.user_config_file, 'w') as f:
+			f.writelines(lines)
+		self.assertEqual(self.cfg.format, '%h')
+		self.assertGreater(self.cfg.stat_workers, 0)
+
+	def test_missing_attribute(self):
+		with self.assertRaises(AttributeError):
+			self.cfg.not_an_option
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -33,6 +33,13 @@ class TestExtractFrame(TestCase):
 		result = models.extract_frame('/path/to/vid_v1_2018.10.exr')
 		self.assertTupleEqual(result, ('/path/to/vid_v1_2018.', '10', '.exr'))
 
+	def test_changed_frame_extract_re(self):
+		models.extract_frame('file.1000.ext')
+		CONFIG.frame_extract_re = r'(\D*)(\d+)(.*)'
+		CONFIG.head_group, CONFIG.frame_group, CONFIG.tail_group = 0, 1, 2
+		result = models.extract_frame('file12.1000.ext')
+		self.assertTupleEqual(result, ('file', '12', '.1000.ext'))
+
 
 class TestSplitExtension(TestCase):
 	def setUp(self):
@@ -73,6 +80,12 @@ class TestFrameRangesToString(TestCase):
 		result = models.frame_ranges_to_string([5])
 		self.assertEqual(result, '[5]')
 
+	def test_convert_unsorted_does_not_mutate(self):
+		frames = [8, 1, 3, 2, 7]
+		result = models.frame_ranges_to_string(frames)
+		self.assertEqual(result, '[1-3, 7-8]')
+		self.assertListEqual(frames, [8, 1, 3, 2, 7])
+
 
 class TestStat(TestCase):
 	def setUp(self):
@@ -118,6 +131,24 @@ class TestStat(TestCase):
 		self.assertIsInstance(self.stat.st_gid, int)
 		self.assertEqual(self.stat.st_gid, 10)
 
+	def test_coerce_strings(self):
+		stat = models.Stat(size='1', mtime='4.1')
+		self.assertIsInstance(stat.st_size, int)
+		self.assertEqual(stat.st_size, 1)
+		self.assertIsInstance(stat.st_mtime, float)
+		self.assertEqual(stat.st_mtime, 4.1)
+
+	def test_invalid_values(self):
+		stat = models.Stat(size='n/a', ino='1.5', mtime='never')
+		self.assertIsNone(stat.st_size)
+		self.assertIsNone(stat.st_ino)
+		self.assertIsNone(stat.st_mtime)
+
+	def test_missing_values(self):
+		stat = models.Stat()
+		self.assertIsNone(stat.st_size)
+		self.assertIsNone(stat.st_atime)
+
 
 class TestFile(TestCase):
 	def setUp(self):
@@ -126,6 +157,7 @@ class TestFile(TestCase):
 		self.file_11 = models.File('/some/file.11.dpx')
 		self.file_011 = models.File('/some/file.011.dpx')
 		self.file_012 = models.File('/some/file.012.dpx')
+		self.file_12 = models.File('/some/file.12.dpx')
 
 	def test_normal_init(self):
 		_file = models.File('/path/to/file.01000.more.ext')
@@ -217,6 +249,13 @@ class TestFile(TestCase):
 		self.assertEqual(_file.uid, 9)
 		self.assertEqual(_file.gid, 10)
 
+	def test_use_stat_dict_invalid_values(self):
+		_file = models.File('/not/a/file/path.none',
+							stats={'size': 'n/a', 'mtime': '8'})
+		self.assertIsInstance(_file.stat, models.Stat)
+		self.assertIsNone(_file.size)
+		self.assertEqual(_file.mtime, 8)
+
 	def test_file_os_stat(self):
 		_file = models.File(__file__, os.stat(__file__))
 		self.assertIsInstance(_file.stat, os.stat_result)
@@ -233,6 +272,20 @@ class TestFile(TestCase):
 		self.assertEqual(_file.size, 15)
 		self.assertIsNone(_file.inode)
 
+	def test_lazy_stat_lookup(self):
+		_file = models.File(__file__)
+		self.assertIsInstance(_file.stat, models.Stat)
+		self.assertEqual(_file.uid, os.stat(__file__).st_uid)
+		self.assertEqual(_file.stat.st_uid, os.stat(__file__).st_uid)
+
+	def test_no_instance_dict(self):
+		self.assertFalse(hasattr(self.file_10, '__dict__'))
+		self.assertFalse(hasattr(self.file_10.stat, '__dict__'))
+
+	def test_unknown_attribute(self):
+		with self.assertRaises(AttributeError):
+			self.file_10.not_a_stat
+
 	def test_get_stats_override_supplied_stats(self):
 		stats = {'size': -15, 'ino': None}
 		_file = models.File(__file__, stats=stats, get_stats=True)
@@ -276,6 +329,12 @@ class TestFile(TestCase):
 	def test_ge_different_padding(self):
 		self.assertGreaterEqual(self.file_012, self.file_11)
 
+	def test_sort_different_sequences(self):
+		other = models.File('/a/different/file.11.exr')
+		files = sorted([self.file_12, other, self.file_11, self.file_10])
+		self.assertListEqual(
+			files, [self.file_10, other, self.file_11, self.file_12])
+
 	def test_eq_same_padding(self):
 		self.assertEqual(self.file_11, self.file_11)
 
@@ -302,6 +361,21 @@ class TestFile(TestCase):
 		self.assertEqual(_file.get_seq_key(ignore_padding=False),
 						 '/path/to/file.%04d.ext')
 
+	def test_get_seq_key_shared(self):
+		self.assertIs(self.file_10.get_seq_key(True),
+					  self.file_11.get_seq_key(True))
+
+	def test_get_seq_key_unicode(self):
+		_file = models.File(u'/path/to/file.1000.ext')
+		self.assertEqual(_file.get_seq_key(True), u'/path/to/file.#.ext')
+		self.assertEqual(_file.get_seq_key(ignore_padding=False),
+						 u'/path/to/file.%04d.ext')
+
+	def test_intern_skip_non_str(self):
+		# Bytes on Python 3, unicode on Python 2.
+		key = b'key' if str is not bytes else u'key'
+		self.assertIs(models._intern(key), key)
+
 	def test_get_seq_key_no_framenum(self):
 		_file = models.File('/path/to/file.ext')
 		self.assertEqual(_file.get_seq_key(True), '/path/to/file.ext')
@@ -383,6 +457,7 @@ class TestSequence(TestCase):
 		self.assertEqual(seq.seq_name, '/path/to/file.%04d.ext')
 		with self.assertRaises(ValueError):
 			seq.append('/path/to/file.00100.ext')
+		self.assertTrue(CONFIG.ignore_padding)
 
 	def test_sequence_size(self):
 		files = [
@@ -396,6 +471,39 @@ class TestSequence(TestCase):
 			sequence.append(_file)
 		self.assertEqual(sequence.size, 30)
 
+	def test_start_end(self):
+		self.assertEqual(self.missing.start, 100)
+		self.assertEqual(self.missing.end, 1010)
+		self.missing.append('/abs/path/to/file_099_name.ext')
+		self.assertEqual(self.missing.start, 99)
+		self.assertEqual(self.missing.end, 1010)
+
+	def test_getitem_after_append(self):
+		self.assertEqual(self.contiguous[-1].frame, 103)
+		self.contiguous.append('/abs/path/to/file_099_name.ext')
+		self.assertEqual(self.contiguous[0].frame, 99)
+		self.assertEqual(self.contiguous.start, 99)
+		self.assertListEqual([f.frame for f in self.contiguous[1:3]],
+							 [100, 101])
+
+	def test_iter_append_order(self):
+		self.contiguous.append('/abs/path/to/file_099_name.ext')
+		frames = [f.frame for f in self.contiguous]
+		self.assertListEqual(frames, [100, 101, 102, 103, 99])
+
+	def test_ordered(self):
+		self.contiguous.append('/abs/path/to/file_099_name.ext')
+		frames = [f.frame for f in self.contiguous.ordered()]
+		self.assertListEqual(frames, [99, 100, 101, 102, 103])
+
+	def test_sequence_size_unknown(self):
+		sequence = models.Sequence(models.File('file.0.ext', {'size': 10}))
+		self.assertEqual(sequence.size, 10)
+		sequence.append(models.File('file.1.ext'))
+		self.assertIsNone(sequence.size)
+		sequence.get_frame(1).stat.st_size = 5
+		self.assertEqual(sequence.size, 15)
+
 	def test_get_missing_frames(self):
 		files = [
 			'/abs/path/to/file_0100_name.ext',
@@ -1,5 +1,7 @@
 import unittest
 import os
+import shutil
+import tempfile
 from unittest import TestCase
 try:
 	from unittest.mock import patch
@@ -9,73 +11,273 @@ from ultrasequence import parsing
 from ultrasequence.config import CONFIG
 
 
-def stat_mock(root, files):
-	dir_list = [os.path.join(root, file) for file in files]
-	return dir_list
-
-
 class TestScanDir(TestCase):
 	def setUp(self):
 		CONFIG.reset_defaults()
+		self.root = tempfile.mkdtemp()
 		self.walk = [
 			(
-				'/root',
+				'',
 				['seq_one', 'seq_two', 'seq_three'],
-			 	['file_a.ext', 'file_b.ext']
+				['file_a.ext', 'file_b.ext']
 			),
 			(
-				'/root/seq_one',
+				'seq_one',
 				[],
 				['seq_one.1000.dxp', 'seq_one.1001.dxp', 'seq_one.1002.dxp']
 			),
 			(
-				'/root/seq_two',
+				'seq_two',
 				['seq_two.0.dxp', 'seq_two.1.dxp', 'seq_two.3.dxp'],
 				[]
 			),
 			(
-				'/root/seq_three',
+				'seq_three',
 				[],
 				['seq_three.mov']
 			)
 		]
+		for root, dirs, files in self.walk:
+			for dir_ in dirs:
+				os.mkdir(os.path.join(self.root, root, dir_))
+			for file_ in files:
+				open(os.path.join(self.root, root, file_), 'w').close()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
 
-	@patch('os.listdir')
-	def test_scan_dir_default_no_recurse(self, mock_listdir):
-		mock_listdir.return_value = self.walk[0][2]
-		with patch('ultrasequence.parsing.stat_files') as mock_stat_files:
-			mock_stat_files.side_effect = stat_mock
-			result = parsing.scan_dir('/root')
-			expected = [os.path.join('/root', file)
-						for file in self.walk[0][2]]
-			self.assertListEqual(result, expected)
-
-	@patch('ultrasequence.parsing.walk')
-	def test_scan_dir_recurse(self, mock_walk):
+	def expected(self, walk):
+		expected = []
+		for root, dirs, files in walk:
+			expected += [os.path.join(self.root, root, file_)
+						 for file_ in files]
+		return sorted(expected)
+
+	def test_scan_dir_default_no_recurse(self):
+		result = list(parsing.scan_dir(self.root))
+		self.assertListEqual(sorted(result), self.expected(self.walk[:1]))
+
+	def test_scan_dir_recurse(self):
 		CONFIG.recurse = True
-		mock_walk.return_value = self.walk
-		with patch('ultrasequence.parsing.stat_files') as mock_stat_files:
-			mock_stat_files.side_effect = stat_mock
-			result = parsing.scan_dir('/root')
-			expected = []
-			for root, dirs, files in self.walk:
-				expected += [os.path.join(root, file) for file in files]
-			self.assertListEqual(result, expected)
-
-	@patch('os.path.isfile', return_value=True)
-	def test_stat_files_default_no_stats(self, mock_isfile):
-		result = parsing.stat_files('/root', self.walk[0][2])
-		expected = [os.path.join('/root', file) for file in self.walk[0][2]]
-		self.assertListEqual(result, expected)
-
-	@patch('os.path.islink', return_value=False)
-	def test_stat_files_enable_stats(self, mock_islink):
+		result = list(parsing.scan_dir(self.root))
+		self.assertListEqual(sorted(result), self.expected(self.walk))
+
+	def test_stat_files_default_no_stats(self):
+		result = list(parsing.stat_files(self.root))
+		self.assertListEqual(sorted(result), self.expected(self.walk[:1]))
+
+	def test_stat_files_reject_file_names(self):
+		with self.assertRaises(TypeError):
+			parsing.stat_files(self.root, self.walk[0][2])
+
+	def test_scan_one_collect_subdirs(self):
+		subdirs = []
+		result = list(parsing._scan_one(self.root, subdirs, False))
+		self.assertListEqual(sorted(result), self.expected(self.walk[:1]))
+		expected = [os.path.join(self.root, dir_) for dir_ in self.walk[0][1]]
+		self.assertListEqual(sorted(subdirs), sorted(expected))
+
+	def test_scan_dir_recurse_skip_unreadable(self):
+		CONFIG.recurse = True
+		unreadable = os.path.join(self.root, 'seq_one')
+		scandir = parsing.scandir
+
+		def scandir_mock(path):
+			if path == unreadable:
+				raise OSError(13, 'Permission denied', path)
+			return scandir(path)
+
+		with patch('ultrasequence.parsing.scandir', scandir_mock):
+			result = list(parsing.scan_dir(self.root))
+		expected = self.expected(self.walk[:1] + self.walk[2:])
+		self.assertListEqual(sorted(result), expected)
+
+	def test_scan_dir_is_lazy(self):
+		CONFIG.recurse = True
+		result = parsing.scan_dir(self.root)
+		self.assertNotIsInstance(result, list)
+		self.assertIn(next(result), self.expected(self.walk))
+
+	def test_stat_files_closes_scandir(self):
+		scandir = parsing.scandir
+		iterators = []
+
+		def scandir_mock(path):
+			iterators.append(scandir(path))
+			return iterators[-1]
+
+		with patch('ultrasequence.parsing.scandir', scandir_mock):
+			result = parsing.stat_files(self.root)
+			next(result)
+			result.close()
+		with self.assertRaises(StopIteration):
+			next(iterators[0])
+
+	def test_stat_files_enable_stats(self):
+		CONFIG.get_stats = True
+		result = sorted(parsing.stat_files(self.root))
+		self.assertListEqual([r[0] for r in result],
+							 self.expected(self.walk[:1]))
+		for path, stat in result:
+			self.assertEqual(stat.st_ino, os.stat(path).st_ino)
+
+	def test_stat_files_enable_stats_no_threads(self):
+		CONFIG.get_stats = True
+		CONFIG.stat_workers = 1
+		result = sorted(parsing.stat_files(self.root))
+		self.assertListEqual([r[0] for r in result],
+							 self.expected(self.walk[:1]))
+		for path, stat in result:
+			self.assertEqual(stat.st_ino, os.stat(path).st_ino)
+
+	def test_scan_dir_stat_chunks(self):
+		CONFIG.get_stats = True
+		CONFIG.stat_workers = 2
+		with patch('ultrasequence.parsing._STAT_CHUNK_SIZE', 1):
+			result = sorted(parsing.scan_dir(self.root, True))
+		self.assertListEqual([r[0] for r in result], self.expected(self.walk))
+		for path, stat in result:
+			self.assertEqual(stat.st_ino, os.stat(path).st_ino)
+
+	def test_stat_entries_skip_missing(self):
+		class Entry(object):
+			def __init__(self, path):
+				self.path = path
+
+			def stat(self):
+				return os.stat(self.path)
+
+		missing = os.path.join(self.root, 'missing.ext')
+		present = os.path.join(self.root, 'file_a.ext')
+		entries = [Entry(missing), Entry(present)]
+		result = [(e.path, s) for e, s in parsing._stat_entries(entries, None)]
+		self.assertListEqual([r[0] for r in result], [present])
+
+	@unittest.skipUnless(hasattr(os, 'symlink'), 'requires symlinks')
+	def test_stat_files_keep_links(self):
+		source = os.path.join(self.root, 'file_a.ext')
+		link = os.path.join(self.root, 'link.ext')
+		os.symlink(source, link)
+		expected = sorted(self.expected(self.walk[:1]) + [link])
+		self.assertListEqual(sorted(parsing.stat_files(self.root)), expected)
 		CONFIG.get_stats = True
-		with patch('os.stat', return_value='stats'):
-			result = parsing.stat_files('/root', self.walk[0][2])
-		expected = [(os.path.join('/root', file), 'stats')
-					for file in self.walk[0][2]]
-		self.assertListEqual(result, expected)
+		result = dict(parsing.stat_files(self.root))
+		self.assertListEqual(sorted(result), expected)
+		self.assertEqual(result[link].st_ino, os.stat(source).st_ino)
+
+
+class TestParser(TestCase):
+	def setUp(self):
+		CONFIG.reset_defaults()
+		fd, self.file_list = tempfile.mkstemp()
+		with os.fdopen(fd, 'w') as f:
+			f.write('\n'.join([
+				'/root/seq.1000.dpx',
+				'/root/seq.1001.dpx',
+				'/root/seq.1002.DPX',
+				'/root/movie.1.mov',
+				'/root/notes.txt',
+			]) + '\n')
+
+	def tearDown(self):
+		os.remove(self.file_list)
+
+	def test_parse_directory_recurse_not_sticky(self):
+		root = tempfile.mkdtemp()
+		try:
+			os.mkdir(os.path.join(root, 'sub'))
+			for frame in range(3):
+				open(os.path.join(root, 'sub', 'seq.%d.dpx' % frame),
+					 'w').close()
+			parser = parsing.Parser()
+			parser.parse_directory(root, recurse=True)
+			self.assertEqual(len(parser.sequences), 1)
+			parser.parse_directory(root)
+			self.assertEqual(len(parser.sequences), 0)
+			self.assertFalse(CONFIG.recurse)
+		finally:
+			shutil.rmtree(root)
+
+	def test_get_stats_not_sticky(self):
+		parser = parsing.Parser(get_stats=True)
+		self.assertTrue(parser.get_stats)
+		self.assertFalse(CONFIG.get_stats)
+		self.assertFalse(parsing.Parser().get_stats)
+
+	def test_parse_file_keep_padding(self):
+		with open(self.file_list, 'w') as f:
+			f.write('/root/seq.001.dpx\n/root/seq.002.dpx\n'
+			        '/root/seq.0003.dpx\n/root/seq.0004.dpx\n')
+		parser = parsing.Parser(ignore_padding=False)
+		parser.parse_file(self.file_list)
+		self.assertListEqual(
+			sorted(seq.seq_name for seq in parser.sequences),
+			['/root/seq.%03d.dpx', '/root/seq.%04d.dpx'])
+		self.assertTrue(CONFIG.ignore_padding)
+
+	def test_parse_file(self):
+		parser = parsing.Parser()
+		parser.parse_file(self.file_list)
+		self.assertEqual(len(parser.sequences), 1)
+		self.assertEqual(parser.sequences[0].frames, 2)
+		self.assertEqual(len(parser.orphan_frames), 2)
+		self.assertEqual(len(parser.no_frame_numbers), 1)
+
+	def test_include_exts_ignore_case(self):
+		parser = parsing.Parser(include_exts=['DPX'])
+		parser.parse_file(self.file_list)
+		self.assertEqual(len(parser.sequences), 1)
+		self.assertEqual(parser.sequences[0].frames, 2)
+		self.assertEqual(len(parser.orphan_frames), 1)
+		self.assertEqual(len(parser.excluded), 2)
+
+	def test_exclude_exts_ignore_case(self):
+		parser = parsing.Parser(exclude_exts=['Dpx', 'txt'])
+		parser.parse_file(self.file_list)
+		self.assertEqual(len(parser.sequences), 0)
+		self.assertEqual(len(parser.orphan_frames), 1)
+		self.assertEqual(len(parser.excluded), 4)
+
+	def test_parse_csv_file(self):
+		with open(self.file_list, 'w') as f:
+			f.write('\n'.join([
+				'/root/seq.1000.dpx\t10\t1',
+				'/root/seq.1001.dpx\t20\t',
+				'"/root/tab\tname.1.dpx"',
+				'',
+			]) + '\n')
+		parser = parsing.Parser()
+		parser.parse_file(self.file_list, csv_sep='\t')
+		self.assertEqual(len(parser.sequences), 1)
+		self.assertEqual(parser.sequences[0].size, 30)
+		self.assertEqual(parser.sequences[0][0].inode, 1)
+		self.assertEqual(parser.orphan_frames[0].abspath,
+						 '/root/tab\tname.1.dpx')
+
+	def test_parse_csv_file_header(self):
+		with open(self.file_list, 'w') as f:
+			f.write('filename,size\n/root/seq.1.dpx,10\n/root/seq.2.dpx,20\n')
+		parser = parsing.Parser()
+		parser.parse_file(self.file_list, csv_sep=',', has_header=True)
+		self.assertEqual(parser.sequences[0].size, 30)
+		self.assertListEqual(parser.no_frame_numbers, [])
+
+	def test_parse_csv_file_multichar_sep(self):
+		with open(self.file_list, 'w') as f:
+			f.write('/root/seq.1.dpx::10\n/root/seq.2.dpx::20\n\n')
+		parser = parsing.Parser()
+		parser.parse_file(self.file_list, csv_sep='::')
+		self.assertEqual(len(parser.sequences), 1)
+		self.assertEqual(parser.sequences[0].size, 30)
+
+	def test_parse_csv_file_quoted_newline(self):
+		with open(self.file_list, 'w') as f:
+			f.write('"/root/new\r\nline/seq.1.dpx",10\n/root/seq.2.dpx,20\n')
+		parser = parsing.Parser()
+		parser.parse_file(self.file_list, csv_sep=',')
+		paths = sorted(f.abspath for f in parser.orphan_frames)
+		self.assertListEqual(paths,
+							 ['/root/new\r\nline/seq.1.dpx', '/root/seq.2.dpx'])
 
 
 if __name__ == '__main__':